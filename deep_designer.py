@@ -2,6 +2,7 @@
 """Stand-alone designer agent for design document generation."""
 import os
 import argparse
+import asyncio
 import random
 from pathlib import Path
 
@@ -10,7 +11,19 @@ from agno.models.anthropic import Claude
 from agno.utils.pprint import pprint_run_response
 from agno.tools.reasoning import ReasoningTools
 
-from tools import ask_customer, read_idea_file, update_design_json
+from tools import (
+    ask_customer,
+    ask_customer_async,
+    find_design_fragments,
+    find_design_fragments_async,
+    get_design_json,
+    get_design_json_async,
+    read_idea_file,
+    read_idea_file_async,
+    update_design_json,
+    update_design_json_async,
+)
+from tool_runner import set_tool_timeouts
 from utils import initialize_design_json
 from models import CompleteDesignDocument
 
@@ -22,13 +35,36 @@ Next ask the user a clarifying question. You can only ask one question at a time
 Transform the Customer's idea into an implementation-ready design document that satisfies them.
 
 ## Requirements
+- Use find_design_fragments to look up matching sections from past design documents, and adapt them instead of writing sections from scratch.
 - Make sure to use reasoning tools to validate the design.
 - You must ask the customer for feedback and approval before completing the work. All user feedback must be addressed.
 - The resulting design document has to be detailed enough that it can be fully implemented without additional information. If the design document needs more details then assign more tasks to the agents."""
 
 
-def create_designer_agent():
-    """Creates a standalone designer agent for document creation."""
+def create_designer_agent(async_tools: bool = True):
+    """Creates a standalone designer agent for document creation.
+
+    Args:
+        async_tools: Use the async tools, which run concurrently and time out.
+            The agent must then be run with ``arun``.
+    """
+    if async_tools:
+        tools = [
+            ask_customer_async,
+            find_design_fragments_async,
+            get_design_json_async,
+            read_idea_file_async,
+            update_design_json_async,
+        ]
+    else:
+        tools = [
+            ask_customer,
+            find_design_fragments,
+            get_design_json,
+            read_idea_file,
+            update_design_json,
+        ]
+
     # Create agent with direct arguments
     agent = Agent(
         name="Designer",
@@ -39,12 +75,7 @@ def create_designer_agent():
         add_name_to_instructions=True,
         #stream_intermediate_steps=True,
         model=Claude(id="claude-3-7-sonnet-latest"),
-        tools=[
-            ReasoningTools(add_instructions=True),
-            ask_customer,
-            read_idea_file,
-            update_design_json,
-        ],
+        tools=[ReasoningTools(add_instructions=True), *tools],
         debug_mode=True,
         response_model=CompleteDesignDocument,
     )
@@ -63,6 +94,19 @@ def parse_arguments():
         default=None,
         help="Path to the IDEA.md file (defaults to ./IDEA.md in the root directory)",
     )
+    parser.add_argument(
+        "--tool-timeout",
+        action="append",
+        default=[],
+        metavar="NAME=SECONDS",
+        help="Timeout for a read-only tool or ask_customer, e.g. ask_customer=600 "
+        "(can be repeated)",
+    )
+    parser.add_argument(
+        "--sync-tools",
+        action="store_true",
+        help="Run tools one after another without timeouts",
+    )
     return parser.parse_args()
 
 
@@ -83,6 +127,16 @@ def get_default_idea_path():
 
 def main():
     """Runs design document generation from IDEA.md content using a single agent."""
+    args = parse_arguments()
+    if args.sync_tools and args.tool_timeout:
+        print("Error: --tool-timeout has no effect with --sync-tools")
+        return
+    try:
+        set_tool_timeouts(args.tool_timeout)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return
+
     # Check if IDEA.md exists
     idea_path = get_default_idea_path()
     if not Path(idea_path).exists():
@@ -94,12 +148,15 @@ def main():
     initialize_design_json()
 
     # Create the designer agent
-    designer = create_designer_agent()
+    designer = create_designer_agent(async_tools=not args.sync_tools)
 
     print("📝 Design Document Generator")
     print("======================================")
 
-    designer.run("Help the customer create design doc")
+    if args.sync_tools:
+        designer.run("Help the customer create design doc")
+    else:
+        asyncio.run(designer.arun("Help the customer create design doc"))
 
     # This doesn't wait for ask_customer response.
     #designer.print_response(
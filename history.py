@@ -0,0 +1,456 @@
+#!/usr/bin/env python3
+"""Content-addressed version history for DESIGN.json.
+
+Every section of DESIGN.json is stored as a tree of hashed blobs. List
+items such as personas, features and screens are stored as separate blobs,
+so identical content is written only once and a snapshot only writes the
+objects that changed.
+"""
+
+import argparse
+import hashlib
+import json
+import re
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils import (
+    get_design_json_path,
+    get_design_structure,
+    get_project_root,
+    validate_design_json,
+)
+
+HEX_PATTERN = re.compile(r"[0-9a-f]+")
+
+
+def get_history_path() -> Path:
+    """Returns the path to the history store."""
+    return get_project_root() / ".design_history"
+
+
+def _encode(obj: Any) -> bytes:
+    """Serializes an object to canonical JSON bytes."""
+    return json.dumps(obj, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+
+def _object_path(digest: str) -> Path:
+    """Returns the path of a stored object."""
+    return get_history_path() / "objects" / digest[:2] / digest[2:]
+
+
+def write_object(obj: Any) -> str:
+    """Stores an object if it is not already present.
+
+    Args:
+        obj: JSON-compatible object to store.
+
+    Returns:
+        The sha256 hex digest of the object.
+    """
+    data = _encode(obj)
+    digest = hashlib.sha256(data).hexdigest()
+    path = _object_path(digest)
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "wb") as file:
+            file.write(data)
+        tmp_path.replace(path)
+    return digest
+
+
+def read_object(digest: str) -> Any:
+    """Loads a stored object by its digest."""
+    with open(_object_path(digest), "rb") as file:
+        return json.loads(file.read())
+
+
+def _is_item_list(value: Any) -> bool:
+    """Returns True for lists of dicts, which are stored item by item."""
+    return isinstance(value, list) and any(isinstance(item, dict) for item in value)
+
+
+def write_section(content: Any) -> str:
+    """Stores a section as a tree object.
+
+    Each field of the section is stored as a blob. Fields holding lists of
+    objects (personas, features, screens, ...) store one blob per item.
+
+    Returns:
+        Digest of the section tree.
+    """
+    if not isinstance(content, dict):
+        return write_object({"type": "blob", "blob": write_object(content)})
+
+    entries = {}
+    for key, value in content.items():
+        if _is_item_list(value):
+            entries[key] = {
+                "type": "list",
+                "items": [write_object(item) for item in value],
+            }
+        else:
+            entries[key] = {"type": "blob", "blob": write_object(value)}
+    return write_object({"type": "tree", "entries": entries})
+
+
+def read_section(digest: str) -> Any:
+    """Rebuilds section content from its tree object."""
+    node = read_object(digest)
+    if node["type"] == "blob":
+        return read_object(node["blob"])
+
+    content = {}
+    for key, entry in node["entries"].items():
+        if entry["type"] == "list":
+            content[key] = [read_object(item) for item in entry["items"]]
+        else:
+            content[key] = read_object(entry["blob"])
+    return content
+
+
+def get_head() -> Optional[str]:
+    """Returns the digest of the latest snapshot, if any."""
+    head_path = get_history_path() / "HEAD"
+    if not head_path.exists():
+        return None
+    return head_path.read_text().strip() or None
+
+
+def _set_head(digest: str) -> None:
+    """Points HEAD at a snapshot."""
+    head_path = get_history_path() / "HEAD"
+    head_path.parent.mkdir(parents=True, exist_ok=True)
+    head_path.write_text(digest + "\n")
+
+
+def _checksum(content: Any) -> str:
+    """Returns a hash of section content without storing any objects."""
+    return hashlib.sha256(_encode(content)).hexdigest()
+
+
+def _is_snapshot(obj: Any) -> bool:
+    """Returns True if a stored object is a snapshot."""
+    return isinstance(obj, dict) and obj.get("type") == "snapshot"
+
+
+def get_design_signature() -> Optional[List[int]]:
+    """Returns the modification time and size of DESIGN.json, if it exists."""
+    design_path = get_design_json_path()
+    if not design_path.exists():
+        return None
+    stat = design_path.stat()
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def _get_head_signature(head: Optional[str]) -> Optional[List[int]]:
+    """Returns the DESIGN.json signature last recorded for HEAD."""
+    signature_path = get_history_path() / "SIGNATURE"
+    if head is None or not signature_path.exists():
+        return None
+    recorded = json.loads(signature_path.read_text())
+    return recorded["signature"] if recorded["head"] == head else None
+
+
+def _set_head_signature(head: str, signature: List[int]) -> None:
+    """Records that DESIGN.json with ``signature`` matches HEAD."""
+    signature_path = get_history_path() / "SIGNATURE"
+    signature_path.write_text(json.dumps({"head": head, "signature": signature}))
+
+
+def _write_snapshot(
+    sections: Dict[str, str], checksums: Dict[str, str], message: str
+) -> str:
+    """Stores a snapshot for a mapping of section names to tree digests."""
+    parent = get_head()
+    if parent is not None and read_object(parent)["sections"] == sections:
+        return parent
+
+    snapshot = {
+        "type": "snapshot",
+        "sections": sections,
+        "checksums": checksums,
+        "parent": parent,
+        "message": message,
+        "timestamp": time.time(),
+    }
+    digest = write_object(snapshot)
+    _set_head(digest)
+    return digest
+
+
+def record_snapshot(
+    design_data: Dict[str, Any],
+    section: Optional[str] = None,
+    message: str = "",
+    signature: Optional[List[int]] = None,
+    base_signature: Optional[List[int]] = None,
+) -> str:
+    """Records a snapshot of the design document.
+
+    Section trees are reused from HEAD when the section is unchanged, so only
+    changed content is stored. Whether a section is unchanged is decided by
+    the DESIGN.json signature (modification time and size) recorded for HEAD
+    when possible:
+
+    - Without ``section``, nothing is hashed if ``signature`` matches.
+    - With ``section``, the other sections are reused without hashing if
+      ``base_signature``, the signature of the document before the update,
+      matches HEAD. Only the updated section is hashed.
+
+    Otherwise every section is hashed and compared with HEAD's checksums, so
+    a re-initialized or hand-edited document is stored correctly.
+
+    Args:
+        design_data: The full design document.
+        section: Optional name of the only section that changed.
+        message: Short description of the change.
+        signature: Signature of DESIGN.json holding ``design_data``.
+        base_signature: Signature of DESIGN.json before ``section`` changed.
+
+    Returns:
+        Digest of the new snapshot, or of HEAD if nothing changed.
+    """
+    head = get_head()
+    previous = read_object(head) if head is not None else {}
+    previous_sections = previous.get("sections", {})
+    previous_checksums = previous.get("checksums", {})
+    previous_signature = _get_head_signature(head)
+
+    if head is not None and section is None and signature is not None:
+        if signature == previous_signature:
+            return head
+    trusted = (
+        section is not None
+        and base_signature is not None
+        and base_signature == previous_signature
+    )
+
+    sections = {}
+    checksums = {}
+    for name, content in design_data.items():
+        if trusted and name != section and name in previous_checksums:
+            sections[name] = previous_sections[name]
+            checksums[name] = previous_checksums[name]
+            continue
+        checksums[name] = _checksum(content)
+        if (
+            name != section
+            and name in previous_sections
+            and previous_checksums.get(name) == checksums[name]
+        ):
+            sections[name] = previous_sections[name]
+        else:
+            sections[name] = write_section(content)
+    digest = _write_snapshot(sections, checksums, message)
+    if signature is not None:
+        _set_head_signature(digest, signature)
+    return digest
+
+
+def resolve(ref: str) -> str:
+    """Resolves a snapshot reference to a full digest.
+
+    Supports ``HEAD``, ``HEAD~N`` and unique digest prefixes.
+
+    Raises:
+        ValueError: If the reference cannot be resolved.
+    """
+    if ref == "HEAD" or ref.startswith("HEAD~"):
+        count = (ref[5:] or "1") if ref.startswith("HEAD~") else "0"
+        if not count.isdigit():
+            raise ValueError(f"Invalid snapshot reference '{ref}'")
+        digest = get_head()
+        steps = int(count)
+        for _ in range(steps):
+            if digest is None:
+                break
+            digest = read_object(digest)["parent"]
+        if digest is None:
+            raise ValueError(f"Snapshot '{ref}' not found")
+        return digest
+
+    if not HEX_PATTERN.fullmatch(ref):
+        raise ValueError(f"Invalid snapshot reference '{ref}'")
+    if len(ref) < 4:
+        raise ValueError(f"Snapshot reference '{ref}' is too short")
+    bucket = get_history_path() / "objects" / ref[:2]
+    candidates = [ref[:2] + path.name for path in bucket.glob(ref[2:] + "*")]
+    matches = [
+        match
+        for match in candidates
+        if HEX_PATTERN.fullmatch(match) and _is_snapshot(read_object(match))
+    ]
+    if not matches:
+        raise ValueError(f"Snapshot '{ref}' not found")
+    if len(matches) > 1:
+        raise ValueError(f"Snapshot reference '{ref}' is ambiguous")
+    return matches[0]
+
+
+def list_history(limit: Optional[int] = None) -> List[Tuple[str, Dict[str, Any]]]:
+    """Returns snapshots from newest to oldest as (digest, snapshot) pairs."""
+    entries: List[Tuple[str, Dict[str, Any]]] = []
+    digest = get_head()
+    while digest is not None and (limit is None or len(entries) < limit):
+        snapshot = read_object(digest)
+        entries.append((digest, snapshot))
+        digest = snapshot["parent"]
+    return entries
+
+
+def load_snapshot(ref: str) -> Dict[str, Any]:
+    """Rebuilds the full design document stored in a snapshot."""
+    snapshot = read_object(resolve(ref))
+    return {name: read_section(tree) for name, tree in snapshot["sections"].items()}
+
+
+def _item_label(digest: str) -> str:
+    """Returns a readable label for a list item."""
+    item = read_object(digest)
+    if isinstance(item, dict) and item.get("name"):
+        return str(item["name"])
+    return digest[:10]
+
+
+def diff_snapshots(old_ref: str, new_ref: str) -> List[str]:
+    """Compares two snapshots by their hashes.
+
+    Unchanged sections, fields and items are skipped without being loaded.
+
+    Returns:
+        Lines describing added, removed and modified content.
+    """
+    old_sections = read_object(resolve(old_ref))["sections"]
+    new_sections = read_object(resolve(new_ref))["sections"]
+    lines = []
+
+    for name in sorted(set(old_sections) | set(new_sections)):
+        old_tree = old_sections.get(name)
+        new_tree = new_sections.get(name)
+        if old_tree == new_tree:
+            continue
+        if old_tree is None or new_tree is None:
+            lines.append(f"{'+' if old_tree is None else '-'} {name}")
+            continue
+
+        old_node = read_object(old_tree)
+        new_node = read_object(new_tree)
+        if old_node["type"] != "tree" or new_node["type"] != "tree":
+            lines.append(f"~ {name}")
+            continue
+
+        old_entries = old_node["entries"]
+        new_entries = new_node["entries"]
+        for key in sorted(set(old_entries) | set(new_entries)):
+            old_entry = old_entries.get(key)
+            new_entry = new_entries.get(key)
+            path = f"{name}.{key}"
+            if old_entry == new_entry:
+                continue
+            if old_entry is None or new_entry is None:
+                lines.append(f"{'+' if old_entry is None else '-'} {path}")
+            elif old_entry["type"] == "list" and new_entry["type"] == "list":
+                old_items = Counter(old_entry["items"])
+                new_items = Counter(new_entry["items"])
+                if old_items == new_items:
+                    lines.append(f"~ {path} (reordered)")
+                    continue
+                # Count-based so removing one of two identical items shows up
+                removed = old_items - new_items
+                added = new_items - old_items
+                for item in old_entry["items"]:
+                    if removed[item] > 0:
+                        removed[item] -= 1
+                        lines.append(f"- {path}[{_item_label(item)}]")
+                for item in new_entry["items"]:
+                    if added[item] > 0:
+                        added[item] -= 1
+                        lines.append(f"+ {path}[{_item_label(item)}]")
+            else:
+                lines.append(f"~ {path}")
+    return lines
+
+
+def checkout(ref: str) -> str:
+    """Restores DESIGN.json to a snapshot.
+
+    The restore is recorded as a new snapshot so it can itself be undone.
+    If DESIGN.json has changed since HEAD, it is recorded first as well.
+
+    Returns:
+        Digest of the restored snapshot.
+    """
+    digest = resolve(ref)
+    design_data = load_snapshot(digest)
+
+    signature = get_design_signature()
+    is_valid, _, current_data = validate_design_json()
+    if is_valid and current_data is not None:
+        record_snapshot(current_data, message="before checkout", signature=signature)
+
+    for section, empty in get_design_structure().items():
+        design_data.setdefault(section, empty)
+
+    # Replace DESIGN.json in one step, like update_design_json, so a
+    # concurrent get_design_json never reads a partially written file
+    design_path = get_design_json_path()
+    tmp_path = design_path.with_suffix(".json.tmp")
+    with open(tmp_path, "w") as file:
+        json.dump(design_data, file, indent=2)
+    tmp_path.replace(design_path)
+
+    sections = read_object(digest)["sections"]
+    checksums = {name: _checksum(design_data[name]) for name in sections}
+    head = _write_snapshot(dict(sections), checksums, f"checkout {digest[:10]}")
+    signature = get_design_signature()
+    if signature is not None:
+        _set_head_signature(head, signature)
+    return digest
+
+
+def parse_arguments():
+    """Parses CLI arguments."""
+    parser = argparse.ArgumentParser(description="DESIGN.json version history")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    history_parser = subparsers.add_parser("history", help="List snapshots")
+    history_parser.add_argument("--limit", "-n", type=int, default=None)
+
+    diff_parser = subparsers.add_parser("diff", help="Compare two snapshots")
+    diff_parser.add_argument("old", nargs="?", default="HEAD~1")
+    diff_parser.add_argument("new", nargs="?", default="HEAD")
+
+    checkout_parser = subparsers.add_parser(
+        "checkout", help="Restore DESIGN.json to a snapshot"
+    )
+    checkout_parser.add_argument("ref")
+    return parser.parse_args()
+
+
+def main():
+    """Runs the history command line interface."""
+    args = parse_arguments()
+
+    try:
+        if args.command == "history":
+            for digest, snapshot in list_history(args.limit):
+                timestamp = time.strftime(
+                    "%Y-%m-%d %H:%M:%S", time.localtime(snapshot["timestamp"])
+                )
+                print(f"{digest[:10]}  {timestamp}  {snapshot['message']}")
+        elif args.command == "diff":
+            lines = diff_snapshots(args.old, args.new)
+            print("\n".join(lines) if lines else "No changes")
+        elif args.command == "checkout":
+            digest = checkout(args.ref)
+            print(f"Restored DESIGN.json to {digest[:10]}")
+    except (ValueError, FileNotFoundError) as e:
+        print(f"Error: {e}")
+
+
+if __name__ == "__main__":
+    main()
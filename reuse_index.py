@@ -0,0 +1,681 @@
+#!/usr/bin/env python3
+"""BM25 reuse index over past design documents.
+
+Past DESIGN.json files are split into fragments (technology stacks, auth
+approaches, UI components, user flows, ...) and indexed in an on-disk
+inverted index. Each build adds a segment holding only new or changed
+documents, segments are merged by compaction, and queries read postings
+through memory-mapped files.
+"""
+
+import argparse
+import json
+import math
+import mmap
+import random
+import re
+import shutil
+import struct
+import tempfile
+import threading
+import time
+from array import array
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from history import get_history_path
+from utils import get_project_root
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# Posting entry: fragment id, term frequency
+POSTING = struct.Struct("<II")
+
+STOPWORDS = {
+    "a",
+    "an",
+    "and",
+    "are",
+    "as",
+    "at",
+    "be",
+    "by",
+    "for",
+    "from",
+    "in",
+    "is",
+    "it",
+    "of",
+    "on",
+    "or",
+    "that",
+    "the",
+    "this",
+    "to",
+    "with",
+}
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def get_index_path() -> Path:
+    """Returns the default path to the reuse index."""
+    return get_project_root() / ".design_index"
+
+
+def tokenize(text: str) -> List[str]:
+    """Splits text into lowercase search terms."""
+    return [
+        token
+        for token in TOKEN_PATTERN.findall(text.lower())
+        if len(token) > 1 and token not in STOPWORDS
+    ]
+
+
+def _flatten_text(value: Any) -> Iterable[str]:
+    """Yields all keys and string values of a JSON value."""
+    if isinstance(value, dict):
+        for key, item in value.items():
+            yield key.replace("_", " ")
+            yield from _flatten_text(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _flatten_text(item)
+    elif value is not None:
+        yield str(value)
+
+
+def extract_fragments(design_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Splits a design document into reusable fragments.
+
+    Every field of every section is a fragment. Fields holding lists of
+    objects (personas, features, components, screens, user flows) produce
+    one fragment per item.
+
+    Returns:
+        List of dicts with ``path`` and ``content`` keys.
+    """
+    fragments = []
+    for section, content in design_data.items():
+        if not isinstance(content, dict):
+            continue
+        for key, value in content.items():
+            if not value:
+                continue
+            if isinstance(value, list) and all(isinstance(v, dict) for v in value):
+                for position, item in enumerate(value):
+                    fragments.append(
+                        {"path": f"{section}.{key}[{position}]", "content": item}
+                    )
+            else:
+                fragments.append({"path": f"{section}.{key}", "content": value})
+    return fragments
+
+
+def _fragment_terms(fragment: Dict[str, Any]) -> Counter:
+    """Counts the search terms of a fragment's path and content."""
+    text = " ".join(
+        _flatten_text({"path": fragment["path"], "content": fragment["content"]})
+    )
+    return Counter(tokenize(text))
+
+
+def _find_design_files(paths: Iterable[str], exclude: Iterable[Path]) -> List[Path]:
+    """Expands files and directories into a list of JSON design files.
+
+    Files inside any of the ``exclude`` directories are skipped, so scanning
+    the project root does not pick up the index or the design history.
+    """
+    excluded = [path.resolve() for path in exclude]
+    files = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            files.extend(sorted(path.rglob("*.json")))
+        elif path.exists():
+            files.append(path)
+
+    design_files = []
+    for design_file in files:
+        resolved = design_file.resolve()
+        if not any(resolved.is_relative_to(directory) for directory in excluded):
+            design_files.append(resolved)
+    return design_files
+
+
+def _map_file(path: Path) -> Optional[mmap.mmap]:
+    """Memory-maps a file for reading, or returns None if it is empty."""
+    if not path.exists() or path.stat().st_size == 0:
+        return None
+    with open(path, "rb") as mapped_file:
+        return mmap.mmap(mapped_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class ReuseIndex:
+    """Incrementally built, memory-mapped BM25 index of design fragments.
+
+    Layout of the index directory:
+        manifest.json: sources, segments, corpus statistics and deletions.
+        fragments.bin: fragments as JSON lines.
+        offsets.bin / lengths.bin: per fragment byte offset and token count.
+        seg_NNNN/terms.json: term -> (posting offset, posting count).
+        seg_NNNN/postings.bin: packed (fragment id, term frequency) pairs.
+
+    Segments are merged and deleted fragments dropped by ``compact``, which
+    ``build`` runs once there are more than ``MAX_SEGMENTS`` segments or
+    more deleted than live fragments.
+    """
+
+    MAX_SEGMENTS = 8
+
+    def __init__(self, index_path: Optional[Path] = None):
+        self.index_path = Path(index_path or get_index_path())
+        self._maps: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._load_manifest()
+
+    def _manifest_signature(self) -> Optional[Tuple[int, int]]:
+        manifest_path = self.index_path / "manifest.json"
+        if not manifest_path.exists():
+            return None
+        stat = manifest_path.stat()
+        return stat.st_ino, stat.st_mtime_ns
+
+    def _load_manifest(self) -> None:
+        manifest_path = self.index_path / "manifest.json"
+        self._signature = self._manifest_signature()
+        if self._signature is None:
+            self.manifest: Dict[str, Any] = {
+                "segments": [],
+                "next_segment": 0,
+                "sources": {},
+                "fragment_count": 0,
+                "total_length": 0,
+                "deleted": [],
+            }
+        else:
+            with open(manifest_path, "r") as manifest_file:
+                self.manifest = json.load(manifest_file)
+        self._deleted = set(self.manifest["deleted"])
+
+    def _save_manifest(self) -> None:
+        manifest_path = self.index_path / "manifest.json"
+        tmp_path = manifest_path.with_suffix(".tmp")
+        with open(tmp_path, "w") as manifest_file:
+            json.dump(self.manifest, manifest_file)
+        tmp_path.replace(manifest_path)
+        self._signature = self._manifest_signature()
+        self._deleted = set(self.manifest["deleted"])
+
+    def refresh(self) -> None:
+        """Reloads the index if another process has rebuilt it."""
+        with self._lock:
+            if self._manifest_signature() != self._signature:
+                self._close()
+                self._load_manifest()
+
+    def close(self) -> None:
+        """Releases memory-mapped files."""
+        with self._lock:
+            self._close()
+
+    def _close(self) -> None:
+        for mapped in self._maps.values():
+            if isinstance(mapped, tuple):
+                mapped = mapped[1]
+            if mapped is not None:
+                mapped.close()
+        self._maps = {}
+
+    def _read_array(self, name: str, typecode: str) -> array:
+        values = array(typecode)
+        path = self.index_path / name
+        if path.exists():
+            with open(path, "rb") as array_file:
+                values.frombytes(array_file.read())
+        return values
+
+    def _write_array(self, name: str, values: array) -> None:
+        tmp_path = self.index_path / (name + ".tmp")
+        with open(tmp_path, "wb") as array_file:
+            values.tofile(array_file)
+        tmp_path.replace(self.index_path / name)
+
+    def build(self, paths: Iterable[str]) -> Dict[str, int]:
+        """Adds new and changed design documents to the index.
+
+        Unchanged files are skipped. Fragments of changed or removed files
+        are marked deleted and the new fragments go into a new segment.
+
+        Args:
+            paths: Design files or directories to scan for JSON files.
+
+        Returns:
+            Counts of scanned, indexed and removed files and new fragments.
+        """
+        with self._lock:
+            stats = self._build(paths)
+            manifest = self.manifest
+            live = manifest["fragment_count"] - len(manifest["deleted"])
+            if (
+                len(manifest["segments"]) > self.MAX_SEGMENTS
+                or len(manifest["deleted"]) > live
+            ):
+                self._compact()
+        return stats
+
+    def _build(self, paths: Iterable[str]) -> Dict[str, int]:
+        self._close()
+        self.index_path.mkdir(parents=True, exist_ok=True)
+        manifest = self.manifest
+        sources = manifest["sources"]
+        deleted = set(manifest["deleted"])
+
+        # Drop anything written after the last saved manifest
+        count = manifest["fragment_count"]
+        offsets = self._read_array("offsets.bin", "Q")[:count]
+        lengths = self._read_array("lengths.bin", "I")[:count]
+        fragments_path = self.index_path / "fragments.bin"
+        end = offsets[-1] if offsets else 0
+        if offsets:
+            with open(fragments_path, "rb") as fragments_reader:
+                fragments_reader.seek(end)
+                end += len(fragments_reader.readline())
+        with open(fragments_path, "ab") as fragments_writer:
+            fragments_writer.truncate(end)
+
+        files = _find_design_files(paths, [self.index_path, get_history_path()])
+        scanned = {str(design_path) for design_path in files}
+        stats = {"scanned": len(files), "indexed": 0, "removed": 0, "fragments": 0}
+
+        # Forget files that were removed from disk
+        for source in list(sources):
+            if source not in scanned and not Path(source).exists():
+                deleted.update(sources.pop(source)["fragments"])
+                stats["removed"] += 1
+
+        postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        with open(fragments_path, "ab") as fragments_writer:
+            for design_path in files:
+                stat = design_path.stat()
+                signature = [stat.st_mtime_ns, stat.st_size]
+                source = str(design_path)
+                if source in sources and sources[source]["signature"] == signature:
+                    continue
+
+                try:
+                    with open(design_path, "r") as design_file:
+                        design_data = json.load(design_file)
+                except (json.JSONDecodeError, UnicodeDecodeError, OSError):
+                    continue
+                if not isinstance(design_data, dict):
+                    continue
+
+                if source in sources:
+                    deleted.update(sources[source]["fragments"])
+                fragment_ids = []
+                for fragment in extract_fragments(design_data):
+                    terms = _fragment_terms(fragment)
+                    if not terms:
+                        continue
+                    fragment["source"] = source
+                    fragment_id = len(offsets)
+                    offsets.append(fragments_writer.tell())
+                    lengths.append(sum(terms.values()))
+                    fragments_writer.write(json.dumps(fragment).encode("utf-8") + b"\n")
+                    for term, frequency in terms.items():
+                        postings[term].append((fragment_id, frequency))
+                    fragment_ids.append(fragment_id)
+
+                sources[source] = {"signature": signature, "fragments": fragment_ids}
+                stats["indexed"] += 1
+                stats["fragments"] += len(fragment_ids)
+
+        if postings:
+            manifest["segments"].append(self._write_segment(postings))
+
+        self._write_array("offsets.bin", offsets)
+        self._write_array("lengths.bin", lengths)
+
+        manifest["fragment_count"] = len(offsets)
+        manifest["total_length"] = sum(
+            length for i, length in enumerate(lengths) if i not in deleted
+        )
+        manifest["deleted"] = sorted(deleted)
+        self._save_manifest()
+        return stats
+
+    def compact(self) -> None:
+        """Merges all segments into one and drops deleted fragments."""
+        with self._lock:
+            self._compact()
+
+    def _compact(self) -> None:
+        # Nothing has been built yet, so there is nothing to merge
+        if self._signature is None:
+            return
+
+        manifest = self.manifest
+        old_segments = list(manifest["segments"])
+        deleted = self._deleted
+
+        # Rewrite live fragments with new, consecutive ids
+        self._close()
+        self._open()
+        new_ids: Dict[int, int] = {}
+        offsets = array("Q")
+        lengths = array("I")
+        postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        tmp_fragments_path = self.index_path / "fragments.bin.tmp"
+        with open(tmp_fragments_path, "wb") as fragments_writer:
+            for old_id in range(manifest["fragment_count"]):
+                if old_id in deleted:
+                    continue
+                fragment = self._fragment(old_id)
+                terms = _fragment_terms(fragment)
+                new_ids[old_id] = len(offsets)
+                offsets.append(fragments_writer.tell())
+                lengths.append(sum(terms.values()))
+                fragments_writer.write(json.dumps(fragment).encode("utf-8") + b"\n")
+                for term, frequency in terms.items():
+                    postings[term].append((new_ids[old_id], frequency))
+        self._close()
+
+        manifest["segments"] = [self._write_segment(postings)] if postings else []
+        tmp_fragments_path.replace(self.index_path / "fragments.bin")
+        self._write_array("offsets.bin", offsets)
+        self._write_array("lengths.bin", lengths)
+
+        for source in manifest["sources"].values():
+            source["fragments"] = [new_ids[i] for i in source["fragments"]]
+        manifest["fragment_count"] = len(offsets)
+        manifest["total_length"] = sum(lengths)
+        manifest["deleted"] = []
+        self._save_manifest()
+
+        for segment in old_segments:
+            shutil.rmtree(self.index_path / segment, ignore_errors=True)
+
+    def _write_segment(self, postings: Dict[str, List[Tuple[int, int]]]) -> str:
+        """Writes postings to a new segment and returns its name."""
+        number = self.manifest.get("next_segment", len(self.manifest["segments"]))
+        self.manifest["next_segment"] = number + 1
+        segment = f"seg_{number:04d}"
+        segment_path = self.index_path / segment
+        segment_path.mkdir(parents=True, exist_ok=True)
+        terms = {}
+        offset = 0
+        with open(segment_path / "postings.bin", "wb") as postings_file:
+            for term in sorted(postings):
+                entries = postings[term]
+                terms[term] = [offset, len(entries)]
+                for entry in entries:
+                    postings_file.write(POSTING.pack(*entry))
+                offset += len(entries)
+        with open(segment_path / "terms.json", "w") as terms_file:
+            json.dump(terms, terms_file)
+        return segment
+
+    def _open(self) -> None:
+        if self._maps:
+            return
+        for segment in self.manifest["segments"]:
+            with open(self.index_path / segment / "terms.json", "r") as terms_file:
+                terms = json.load(terms_file)
+            postings = _map_file(self.index_path / segment / "postings.bin")
+            self._maps[segment] = (terms, postings)
+        self._maps["fragments"] = _map_file(self.index_path / "fragments.bin")
+        self._maps["offsets"] = _map_file(self.index_path / "offsets.bin")
+        self._maps["lengths"] = _map_file(self.index_path / "lengths.bin")
+
+    def _fragment(self, fragment_id: int) -> Dict[str, Any]:
+        offset = memoryview(self._maps["offsets"]).cast("Q")[fragment_id]
+        fragments = self._maps["fragments"]
+        end = fragments.find(b"\n", offset)
+        return json.loads(fragments[offset:end])
+
+    def search(self, text: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """Returns the fragments best matching a text, ranked by BM25.
+
+        Args:
+            text: Free text such as the product idea.
+            limit: Maximum number of fragments to return.
+
+        Returns:
+            Fragments with ``path``, ``source``, ``content`` and ``score``.
+        """
+        with self._lock:
+            return self._search(text, limit)
+
+    def _search(self, text: str, limit: int) -> List[Dict[str, Any]]:
+        deleted = self._deleted
+        live = self.manifest["fragment_count"] - len(deleted)
+        if live <= 0:
+            return []
+        self._open()
+        lengths = memoryview(self._maps["lengths"]).cast("I")
+        average_length = self.manifest["total_length"] / live
+
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(tokenize(text)):
+            matches: List[Tuple[int, int]] = []
+            for segment in self.manifest["segments"]:
+                terms, postings = self._maps[segment]
+                if term not in terms:
+                    continue
+                start, size = terms[term]
+                view = postings[start * POSTING.size : (start + size) * POSTING.size]
+                matches.extend(
+                    entry
+                    for entry in POSTING.iter_unpack(view)
+                    if entry[0] not in deleted
+                )
+            if not matches:
+                continue
+
+            idf = math.log(1 + (live - len(matches) + 0.5) / (len(matches) + 0.5))
+            for fragment_id, frequency in matches:
+                norm = K1 * (1 - B + B * lengths[fragment_id] / average_length)
+                scores[fragment_id] += idf * frequency * (K1 + 1) / (frequency + norm)
+        lengths.release()
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        results = []
+        for fragment_id, score in ranked[:limit]:
+            fragment = self._fragment(fragment_id)
+            fragment["score"] = round(score, 3)
+            results.append(fragment)
+        return results
+
+
+# Open indexes shared by all tool calls in this process, by index path
+_open_indexes: Dict[Path, ReuseIndex] = {}
+_open_indexes_lock = threading.Lock()
+
+
+def get_reuse_index(index_path: Optional[Path] = None) -> ReuseIndex:
+    """Returns the process-wide index for a path, reloaded if rebuilt.
+
+    Keeping one open index avoids loading every segment's terms on each
+    tool call.
+    """
+    path = Path(index_path or get_index_path())
+    with _open_indexes_lock:
+        index = _open_indexes.get(path)
+        if index is None:
+            index = _open_indexes[path] = ReuseIndex(path)
+            return index
+    index.refresh()
+    return index
+
+
+def synthetic_design(rng: random.Random, vocabulary: List[str]) -> Dict[str, Any]:
+    """Creates a random design document for benchmarking."""
+
+    def words(count: int) -> str:
+        return " ".join(rng.choice(vocabulary) for _ in range(count))
+
+    return {
+        "idea": {"audience": words(20), "business_model": words(20)},
+        "marketing": {
+            "user_personas": [
+                {"name": words(2), "background": words(30)} for _ in range(3)
+            ],
+        },
+        "architecture": {
+            "technology_stack": {
+                "frontend": [words(1) for _ in range(3)],
+                "backend": [words(1) for _ in range(3)],
+                "database": words(1),
+            },
+            "system_architecture": {"auth_approach": words(25)},
+        },
+        "design": {
+            "components": [
+                {"name": words(2), "variants": [words(1)]} for _ in range(8)
+            ],
+            "user_flows": [{"name": words(3), "steps": [words(8)]} for _ in range(4)],
+        },
+        "tasks": {},
+    }
+
+
+def _time_queries(search: Callable[[str], Any], texts: List[str]) -> float:
+    """Returns the average latency of ``search`` in milliseconds."""
+    start = time.perf_counter()
+    for text in texts:
+        search(text)
+    return (time.perf_counter() - start) / len(texts) * 1000
+
+
+def benchmark(
+    documents: int = 500, queries: int = 200, updates: int = 10
+) -> Dict[str, float]:
+    """Measures index build and tool call latency on synthetic documents.
+
+    After the full build, ``updates`` incremental builds each rewrite one
+    document, so queries also run against an index with several segments.
+    Tool calls are timed both on the shared index that
+    ``find_design_fragments`` uses and on a newly opened index per call.
+
+    Returns:
+        Timings in milliseconds.
+    """
+    rng = random.Random(0)
+    vocabulary = [f"term{i}" for i in range(5000)]
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus_path = Path(tmp) / "corpus"
+        corpus_path.mkdir()
+        for i in range(documents):
+            with open(corpus_path / f"design_{i}.json", "w") as design_file:
+                json.dump(synthetic_design(rng, vocabulary), design_file)
+
+        index_path = Path(tmp) / "index"
+        index = ReuseIndex(index_path)
+        start = time.perf_counter()
+        index.build([str(corpus_path)])
+        full_build = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for i in range(updates):
+            with open(corpus_path / f"design_{i}.json", "w") as design_file:
+                json.dump(synthetic_design(rng, vocabulary), design_file)
+            index.build([str(corpus_path)])
+        incremental_build = (time.perf_counter() - start) / max(updates, 1)
+        segments = len(index.manifest["segments"])
+
+        texts = [" ".join(rng.sample(vocabulary, 30)) for _ in range(queries)]
+
+        def search_new_index(text: str) -> None:
+            new_index = ReuseIndex(index_path)
+            new_index.search(text)
+            new_index.close()
+
+        def search_shared_index(text: str) -> None:
+            get_reuse_index(index_path).search(text)
+
+        cold_query = _time_queries(search_new_index, texts)
+        search_shared_index(texts[0])
+        shared_query = _time_queries(search_shared_index, texts)
+
+        start = time.perf_counter()
+        index.compact()
+        compact = time.perf_counter() - start
+        compacted_query = _time_queries(search_shared_index, texts)
+
+        index.close()
+        _open_indexes.pop(index_path).close()
+
+    return {
+        "documents": documents,
+        "segments": segments,
+        "full_build_ms": full_build * 1000,
+        "incremental_build_ms": incremental_build * 1000,
+        "compact_ms": compact * 1000,
+        "new_index_query_ms": cold_query,
+        "shared_index_query_ms": shared_query,
+        "compacted_query_ms": compacted_query,
+    }
+
+
+def parse_arguments():
+    """Parses CLI arguments."""
+    parser = argparse.ArgumentParser(description="Reuse index of past designs")
+    parser.add_argument("--index", type=str, default=None, help="Index directory path")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="Index design documents")
+    build_parser.add_argument("paths", nargs="+", help="Design files or directories")
+
+    subparsers.add_parser("compact", help="Merge segments and drop deleted fragments")
+
+    search_parser = subparsers.add_parser("search", help="Search the index")
+    search_parser.add_argument("text")
+    search_parser.add_argument("--limit", "-n", type=int, default=5)
+
+    bench_parser = subparsers.add_parser("bench", help="Benchmark the index")
+    bench_parser.add_argument("--documents", type=int, default=500)
+    bench_parser.add_argument("--queries", type=int, default=200)
+    bench_parser.add_argument("--updates", type=int, default=10)
+    return parser.parse_args()
+
+
+def main():
+    """Runs the reuse index command line interface."""
+    args = parse_arguments()
+
+    if args.command == "bench":
+        results = benchmark(args.documents, args.queries, args.updates)
+        rows = [
+            ("Documents", f"{results['documents']}"),
+            ("Segments", f"{results['segments']}"),
+            ("Full build", f"{results['full_build_ms']:.1f} ms"),
+            ("Incremental build", f"{results['incremental_build_ms']:.1f} ms"),
+            ("Compact", f"{results['compact_ms']:.1f} ms"),
+            ("Tool call, new index", f"{results['new_index_query_ms']:.3f} ms"),
+            ("Tool call, shared", f"{results['shared_index_query_ms']:.3f} ms"),
+            ("Tool call, compacted", f"{results['compacted_query_ms']:.3f} ms"),
+        ]
+        for label, value in rows:
+            print(f"{label + ':':<24}{value}")
+        return
+
+    index = ReuseIndex(Path(args.index) if args.index else None)
+    if args.command == "build":
+        stats = index.build(args.paths)
+        print(
+            f"Scanned {stats['scanned']} files, indexed {stats['indexed']}, "
+            f"removed {stats['removed']}, added {stats['fragments']} fragments"
+        )
+    elif args.command == "compact":
+        index.compact()
+        print(f"Compacted index into {len(index.manifest['segments'])} segment(s)")
+    elif args.command == "search":
+        print(json.dumps(index.search(args.text, args.limit), indent=2))
+    index.close()
+
+
+if __name__ == "__main__":
+    main()
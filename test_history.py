@@ -0,0 +1,162 @@
+"""Tests for the DESIGN.json version history."""
+
+import json
+
+import pytest
+
+import history
+import utils
+from utils import get_design_structure
+
+
+@pytest.fixture(autouse=True)
+def project_root(tmp_path, monkeypatch):
+    """Points the project root at a temporary directory."""
+    monkeypatch.setattr(utils, "get_project_root", lambda: tmp_path)
+    monkeypatch.setattr(history, "get_project_root", lambda: tmp_path)
+    return tmp_path
+
+
+def make_design(*personas):
+    design = get_design_structure()
+    design["marketing"] = {
+        "market_analysis": {"target_audience_overview": "Small teams"},
+        "user_personas": [{"name": name, "role": "Developer"} for name in personas],
+    }
+    return design
+
+
+def count_objects(project_root):
+    objects = project_root / ".design_history" / "objects"
+    return sum(1 for path in objects.rglob("*") if path.is_file())
+
+
+def test_snapshot_round_trip():
+    design = make_design("Ada", "Grace")
+    history.record_snapshot(design, message="init")
+
+    assert history.load_snapshot("HEAD") == design
+    assert [s["message"] for _, s in history.list_history()] == ["init"]
+
+
+def test_snapshot_stores_only_changes(project_root):
+    design = make_design("Ada", "Grace")
+    history.record_snapshot(design, message="init")
+    before = count_objects(project_root)
+
+    design["marketing"]["user_personas"].append({"name": "Linus", "role": "Ops"})
+    history.record_snapshot(design, "marketing", "add persona")
+
+    # New persona blob, new marketing tree and new snapshot only
+    assert count_objects(project_root) - before == 3
+    assert history.load_snapshot("HEAD") == design
+
+
+def test_unchanged_document_does_not_create_snapshot():
+    design = make_design("Ada")
+    first = history.record_snapshot(design, message="init")
+    second = history.record_snapshot(design, "marketing", "no-op")
+
+    assert first == second
+    assert len(history.list_history()) == 1
+
+
+def test_diff_reports_added_removed_and_modified():
+    design = make_design("Ada", "Grace")
+    history.record_snapshot(design, message="init")
+
+    design["marketing"]["user_personas"] = [{"name": "Linus", "role": "Ops"}]
+    design["marketing"]["market_analysis"] = {"target_audience_overview": "Enterprises"}
+    history.record_snapshot(design, "marketing", "update marketing")
+
+    assert history.diff_snapshots("HEAD~1", "HEAD") == [
+        "~ marketing.market_analysis",
+        "- marketing.user_personas[Ada]",
+        "- marketing.user_personas[Grace]",
+        "+ marketing.user_personas[Linus]",
+    ]
+    assert history.diff_snapshots("HEAD", "HEAD") == []
+
+
+def test_checkout_restores_design_and_is_undoable(project_root):
+    original = make_design("Ada")
+    first = history.record_snapshot(original, message="init")
+    changed = make_design("Grace")
+    history.record_snapshot(changed, "marketing", "update marketing")
+
+    history.checkout(first[:8])
+
+    with open(project_root / "DESIGN.json") as file:
+        assert json.load(file) == original
+    assert history.load_snapshot("HEAD") == original
+    assert history.list_history()[0][1]["message"] == f"checkout {first[:10]}"
+    assert history.load_snapshot("HEAD~1") == changed
+
+
+def test_resolve_prefix_and_head():
+    first = history.record_snapshot(make_design("Ada"), message="init")
+    second = history.record_snapshot(make_design("Grace"), "marketing", "update")
+
+    assert history.resolve(first[:6]) == first
+    assert history.resolve("HEAD") == second
+    assert history.resolve("HEAD~") == first
+    assert history.resolve("HEAD~1") == first
+    with pytest.raises(ValueError):
+        history.resolve("HEAD~2")
+    with pytest.raises(ValueError):
+        history.resolve("HEAD~-1")
+    with pytest.raises(ValueError):
+        history.resolve("not-a-digest")
+
+
+def test_resolve_ignores_non_snapshot_objects():
+    history.record_snapshot(make_design("parent company"), message="init")
+    blob = history.write_object("parent company")
+
+    with pytest.raises(ValueError):
+        history.resolve(blob[:8])
+
+
+def test_fresh_session_does_not_reuse_stale_sections():
+    history.record_snapshot(make_design("Ada"), message="old session")
+
+    # A new session starts from an empty document and updates one section
+    design = get_design_structure()
+    design["idea"] = {"audience": "Designers"}
+    history.record_snapshot(design, "idea", "update idea")
+
+    assert history.load_snapshot("HEAD") == design
+
+
+def test_diff_reports_removed_duplicate():
+    design = make_design("Ada", "Ada")
+    history.record_snapshot(design, message="init")
+    design["marketing"]["user_personas"].pop()
+    history.record_snapshot(design, "marketing", "remove duplicate")
+
+    assert history.diff_snapshots("HEAD~1", "HEAD") == [
+        "- marketing.user_personas[Ada]"
+    ]
+
+
+def test_update_after_hand_edit_can_be_undone(project_root):
+    import tools
+
+    first = make_design("Ada")
+    utils.initialize_design_json()
+    with open(project_root / "DESIGN.json", "w") as file:
+        json.dump(first, file)
+    tools.update_design_json.entrypoint("idea", {"audience": "Designers"})
+
+    # Edit DESIGN.json by hand, then update another section
+    edited = make_design("Ada", "Grace")
+    edited["idea"] = {"audience": "Designers"}
+    with open(project_root / "DESIGN.json", "w") as file:
+        json.dump(edited, file)
+    result = tools.update_design_json.entrypoint("tasks", {"milestones": ["MVP"]})
+    assert "warning" not in json.loads(result)
+
+    history.checkout("HEAD~1")
+
+    with open(project_root / "DESIGN.json") as file:
+        assert json.load(file) == edited
@@ -0,0 +1,140 @@
+"""Tests for the reuse index over past design documents."""
+
+import json
+
+import pytest
+
+import history
+import utils
+from reuse_index import ReuseIndex, get_reuse_index
+
+
+@pytest.fixture(autouse=True)
+def project_root(tmp_path, monkeypatch):
+    """Points the project root at a temporary directory."""
+    monkeypatch.setattr(utils, "get_project_root", lambda: tmp_path)
+    monkeypatch.setattr(history, "get_project_root", lambda: tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    corpus_path = tmp_path / "designs"
+    corpus_path.mkdir()
+    return corpus_path
+
+
+@pytest.fixture
+def index(tmp_path):
+    reuse_index = ReuseIndex(tmp_path / ".design_index")
+    yield reuse_index
+    reuse_index.close()
+
+
+def write_design(path, auth_approach, database="PostgreSQL"):
+    design = {
+        "idea": {"audience": "Small businesses"},
+        "marketing": {},
+        "architecture": {
+            "technology_stack": {"backend": ["FastAPI"], "database": database},
+            "system_architecture": {"auth_approach": auth_approach},
+        },
+        "design": {"user_flows": [{"name": "Sign in", "steps": ["Open"]}]},
+        "tasks": {},
+    }
+    with open(path, "w") as design_file:
+        json.dump(design, design_file)
+
+
+def test_search_ranks_best_match_first(corpus, index):
+    write_design(corpus / "a.json", "OAuth login with JWT tokens")
+    write_design(corpus / "b.json", "API keys", database="MongoDB")
+    index.build([str(corpus)])
+
+    results = index.search("jwt oauth login")
+    assert results[0]["path"] == "architecture.system_architecture"
+    assert results[0]["source"] == str((corpus / "a.json").resolve())
+
+    results = index.search("mongodb", limit=1)
+    assert results[0]["content"]["database"] == "MongoDB"
+
+
+def test_incremental_build_only_indexes_changes(corpus, index):
+    write_design(corpus / "a.json", "OAuth login")
+    write_design(corpus / "b.json", "API keys")
+    assert index.build([str(corpus)])["indexed"] == 2
+    assert index.build([str(corpus)])["indexed"] == 0
+
+    write_design(corpus / "a.json", "Magic link email login")
+    stats = index.build([str(corpus)])
+    assert stats["indexed"] == 1
+    assert index.search("oauth") == []
+    assert index.search("magic link")[0]["content"]["auth_approach"].startswith("Magic")
+
+
+def test_removed_file_is_dropped(corpus, index):
+    write_design(corpus / "a.json", "OAuth login")
+    write_design(corpus / "b.json", "API keys")
+    index.build([str(corpus)])
+
+    (corpus / "a.json").unlink()
+    assert index.build([str(corpus)])["removed"] == 1
+    assert index.search("oauth") == []
+    assert index.search("api keys")
+
+
+def test_compact_merges_segments_and_keeps_results(corpus, index):
+    for i in range(3):
+        write_design(corpus / f"design_{i}.json", f"Auth variant{i}")
+        index.build([str(corpus)])
+    write_design(corpus / "design_0.json", "Passkeys")
+    index.build([str(corpus)])
+    before = index.search("auth passkeys variant1", limit=10)
+    assert len(index.manifest["segments"]) == 4
+
+    index.compact()
+
+    assert len(index.manifest["segments"]) == 1
+    assert index.manifest["deleted"] == []
+    assert index.search("auth passkeys variant1", limit=10) == before
+    assert ReuseIndex(index.index_path).search("passkeys")
+
+
+def test_build_compacts_past_segment_limit(corpus, index):
+    for i in range(ReuseIndex.MAX_SEGMENTS + 1):
+        write_design(corpus / f"design_{i}.json", f"Auth variant{i}")
+        index.build([str(corpus)])
+
+    assert len(index.manifest["segments"]) == 1
+    assert len(index.search("auth", limit=100)) == ReuseIndex.MAX_SEGMENTS + 1
+
+
+def test_build_skips_index_and_history(project_root, index):
+    write_design(project_root / "DESIGN.json", "OAuth login")
+    index.build([str(project_root)])
+    history.record_snapshot({"idea": {"audience": "Designers"}})
+    index.build([str(project_root)])
+
+    sources = set(index.manifest["sources"])
+    assert sources == {str((project_root / "DESIGN.json").resolve())}
+
+
+def test_shared_index_reloads_after_rebuild(corpus, index):
+    write_design(corpus / "a.json", "OAuth login")
+    index.build([str(corpus)])
+    shared = get_reuse_index(index.index_path)
+    assert shared.search("oauth")
+
+    write_design(corpus / "b.json", "Passkeys")
+    index.build([str(corpus)])
+    assert get_reuse_index(index.index_path) is shared
+    assert shared.search("passkeys")
+    shared.close()
+
+
+def test_compact_without_index_is_a_no_op(index):
+    index.compact()
+
+    assert index.manifest["segments"] == []
+    assert not index.index_path.exists()
+    assert index.search("oauth") == []
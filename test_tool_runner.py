@@ -0,0 +1,56 @@
+"""Tests for async tool timeouts."""
+
+import asyncio
+import json
+
+import pytest
+
+import tool_runner
+
+
+@pytest.fixture(autouse=True)
+def timeouts(monkeypatch):
+    """Restores the default timeouts after each test."""
+    monkeypatch.setattr(tool_runner, "TOOL_TIMEOUTS", dict(tool_runner.TOOL_TIMEOUTS))
+
+
+def test_set_tool_timeouts():
+    tool_runner.set_tool_timeouts(["ask_customer=600", "get_design_json=2.5"])
+
+    assert tool_runner.get_tool_timeout("ask_customer") == 600
+    assert tool_runner.get_tool_timeout("get_design_json") == 2.5
+
+
+@pytest.mark.parametrize(
+    "spec",
+    ["ask_custmer=600", "update_design_json=10", "ask_customer", "ask_customer=abc"],
+)
+def test_set_tool_timeouts_rejects_invalid_specs(spec):
+    with pytest.raises(ValueError):
+        tool_runner.set_tool_timeouts([spec])
+
+
+@pytest.mark.parametrize("seconds", ["0", "-1", "nan"])
+def test_set_tool_timeouts_requires_positive_seconds(seconds):
+    with pytest.raises(ValueError):
+        tool_runner.set_tool_timeouts([f"ask_customer={seconds}"])
+
+
+def test_run_with_timeout_returns_fallback():
+    tool_runner.set_tool_timeouts(["get_design_json=0.01"])
+
+    async def hang():
+        await asyncio.sleep(10)
+        return "done"
+
+    result = asyncio.run(tool_runner.run_with_timeout("get_design_json", hang()))
+    assert "timed out" in json.loads(result)["error"]
+    assert (
+        asyncio.run(tool_runner.run_with_timeout("get_design_json", hang(), "fallback"))
+        == "fallback"
+    )
+
+
+def test_run_in_thread_returns_result():
+    result = asyncio.run(tool_runner.run_in_thread("read_idea_file", str.upper, "idea"))
+    assert result == "IDEA"
@@ -0,0 +1,109 @@
+"""Tests for the async tools."""
+
+import asyncio
+import json
+import time
+
+import pytest
+from agno.models.anthropic import Claude
+from agno.tools.function import FunctionCall
+
+import history
+import tool_runner
+import tools
+import utils
+
+
+@pytest.fixture(autouse=True)
+def project_root(tmp_path, monkeypatch):
+    """Points the project root at a temporary directory with a DESIGN.json."""
+    monkeypatch.setattr(utils, "get_project_root", lambda: tmp_path)
+    monkeypatch.setattr(history, "get_project_root", lambda: tmp_path)
+    monkeypatch.setattr(tool_runner, "TOOL_TIMEOUTS", dict(tool_runner.TOOL_TIMEOUTS))
+    # Each test runs its own event loop
+    monkeypatch.setattr(tools, "_design_update_lock", asyncio.Lock())
+    monkeypatch.setattr(tools, "_ask_customer_lock", asyncio.Lock())
+    utils.initialize_design_json()
+    return tmp_path
+
+
+def slow(func, delay):
+    def wrapper(*args, **kwargs):
+        time.sleep(delay)
+        return func(*args, **kwargs)
+
+    return wrapper
+
+
+def test_ask_customer_returns_fallback_on_timeout(monkeypatch):
+    tool_runner.set_tool_timeouts(["ask_customer=0.05"])
+    cancelled = []
+
+    class HangingQuestion:
+        async def ask_async(self, patch_stdout=False):
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+
+    monkeypatch.setattr(tools.questionary, "text", lambda _: HangingQuestion())
+
+    result = asyncio.run(tools.ask_customer_async.entrypoint("Who is the audience?"))
+
+    assert result.startswith("Question: Who is the audience?")
+    assert "No response from the customer" in result
+    assert cancelled == [True]
+
+
+def test_read_only_tool_times_out(monkeypatch):
+    tool_runner.set_tool_timeouts(["get_design_json=0.05"])
+    entrypoint = tools.get_design_json.entrypoint
+    monkeypatch.setattr(tools.get_design_json, "entrypoint", slow(entrypoint, 0.3))
+
+    result = asyncio.run(tools.get_design_json_async.entrypoint("idea"))
+
+    assert "timed out" in json.loads(result)["error"]
+
+
+def test_cancelled_update_finishes_and_holds_lock(project_root, monkeypatch):
+    entrypoint = tools.update_design_json.entrypoint
+    monkeypatch.setattr(tools.update_design_json, "entrypoint", slow(entrypoint, 0.2))
+    update_async = tools.update_design_json_async.entrypoint
+
+    async def cancel_update() -> bool:
+        update = asyncio.create_task(update_async("idea", {"audience": "Teams"}))
+        await asyncio.sleep(0.05)
+        update.cancel()
+        await asyncio.sleep(0.05)
+        # The write is still running, so the lock must still be held
+        locked = tools._design_update_lock.locked()
+        with pytest.raises(asyncio.CancelledError):
+            await update
+        return locked
+
+    assert asyncio.run(cancel_update())
+    assert not tools._design_update_lock.locked()
+    with open(project_root / "DESIGN.json") as file:
+        assert json.load(file)["idea"] == {"audience": "Teams"}
+
+
+def test_async_tools_run_concurrently(monkeypatch):
+    entrypoint = tools.get_design_json.entrypoint
+    monkeypatch.setattr(tools.get_design_json, "entrypoint", slow(entrypoint, 0.2))
+    calls = [
+        FunctionCall(function=tools.get_design_json_async, arguments={"section": name})
+        for name in ("idea", "marketing", "design")
+    ]
+
+    async def run_calls() -> None:
+        model = Claude(id="claude-3-7-sonnet-latest")
+        async for _ in model.arun_function_calls(calls, []):
+            pass
+
+    start = time.perf_counter()
+    asyncio.run(run_calls())
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < 0.5
+    assert all(json.loads(call.result) == {} for call in calls)
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""Timeouts for async tools and a benchmark of concurrent tool calls."""
+
+import argparse
+import asyncio
+import contextlib
+import functools
+import io
+import json
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from unittest import mock
+
+# Timeout in seconds per tool name. update_design_json has no timeout because
+# an abandoned write would still land after the model was told it failed.
+TOOL_TIMEOUTS: Dict[str, float] = {
+    "ask_customer": 900.0,
+    "read_idea_file": 30.0,
+    "get_design_json": 30.0,
+    "find_design_fragments": 30.0,
+}
+
+
+def get_tool_timeout(name: str) -> float:
+    """Returns the timeout in seconds for a tool."""
+    return TOOL_TIMEOUTS[name]
+
+
+def set_tool_timeouts(specs: List[str]) -> None:
+    """Updates tool timeouts from ``name=seconds`` strings.
+
+    Raises:
+        ValueError: If a spec is malformed, names an unknown tool or is not
+            a positive number of seconds.
+    """
+    for spec in specs:
+        name, _, seconds = spec.partition("=")
+        if name not in TOOL_TIMEOUTS:
+            known = ", ".join(sorted(TOOL_TIMEOUTS))
+            raise ValueError(
+                f"Unknown tool '{name}' in '{spec}', expected one of: {known}"
+            )
+        try:
+            timeout = float(seconds)
+        except ValueError:
+            raise ValueError(f"Invalid tool timeout '{spec}', expected name=seconds")
+        if not timeout > 0:
+            raise ValueError(f"Tool timeout for '{name}' must be greater than 0")
+        TOOL_TIMEOUTS[name] = timeout
+
+
+def timeout_fallback(name: str, timeout: float) -> str:
+    """Returns the default result for a tool that timed out."""
+    return json.dumps({"error": f"Tool '{name}' timed out after {timeout:g} seconds"})
+
+
+async def run_with_timeout(
+    name: str, awaitable: Awaitable[str], fallback: Optional[str] = None
+) -> str:
+    """Awaits a tool call, cancelling it when its timeout expires.
+
+    Args:
+        name: Tool name used to look up the timeout.
+        awaitable: The tool call to run.
+        fallback: Result to return on timeout. Defaults to a JSON error.
+
+    Returns:
+        The tool result, or the fallback if the call timed out.
+    """
+    timeout = get_tool_timeout(name)
+    try:
+        return await asyncio.wait_for(awaitable, timeout)
+    except asyncio.TimeoutError:
+        print(f"🛠️ [{name}] Timed out after {timeout:g} seconds")
+        return fallback if fallback is not None else timeout_fallback(name, timeout)
+
+
+async def run_in_thread(name: str, func: Callable[..., str], *args: Any) -> str:
+    """Runs a blocking, read-only tool function in a worker thread with a timeout.
+
+    A worker thread cannot be interrupted, so on timeout or cancellation the
+    call is abandoned and its result is discarded. Tools that write must not
+    use this.
+    """
+    return await run_with_timeout(name, asyncio.to_thread(func, *args))
+
+
+def _benchmark_project(root: Path, documents: int) -> None:
+    """Writes a DESIGN.json, IDEA.md and reuse index into a scratch project."""
+    from reuse_index import ReuseIndex, synthetic_design
+
+    rng = random.Random(0)
+    vocabulary = [f"term{i}" for i in range(5000)]
+    corpus_path = root / "designs"
+    corpus_path.mkdir()
+    for i in range(documents):
+        with open(corpus_path / f"design_{i}.json", "w") as design_file:
+            json.dump(synthetic_design(rng, vocabulary), design_file)
+    with open(root / "DESIGN.json", "w") as design_file:
+        json.dump(synthetic_design(rng, vocabulary), design_file)
+    with open(root / "IDEA.md", "w") as idea_file:
+        idea_file.write("# Idea document\n\n## Problem\n\n- " + "word " * 200 + "\n")
+
+    index = ReuseIndex(root / ".design_index")
+    index.build([str(corpus_path)])
+    index.close()
+
+
+def _delayed(func: Callable[..., str], delay: float) -> Callable[..., str]:
+    """Wraps a tool function so each call first blocks for ``delay`` seconds."""
+
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> str:
+        time.sleep(delay)
+        return func(*args, **kwargs)
+
+    return wrapper
+
+
+def benchmark(
+    turns: int = 50, documents: int = 200, io_delay_ms: float = 20.0
+) -> Dict[str, float]:
+    """Measures the latency of one turn of independent tool calls.
+
+    The turn reads the idea file, four DESIGN.json sections and searches the
+    reuse index. The sync tools run through agno's ``run_function_calls``,
+    one after another, as with ``Agent.run``. The async tools run through
+    ``arun_function_calls``, which gathers them, as with ``Agent.arun``.
+
+    Each mode is measured twice: on local files, and with every tool call
+    blocked for ``io_delay_ms`` first, as on a network file system.
+
+    Returns:
+        Average turn latency in milliseconds for both modes, with and
+        without the I/O wait.
+    """
+    # Imported here because tools imports this module
+    import history
+    import reuse_index
+    import tools
+    import utils
+    from agno.models.anthropic import Claude
+    from agno.tools.function import Function, FunctionCall
+
+    sections = ["idea", "marketing", "architecture", "design"]
+
+    def turn_calls(
+        read_idea: Function, get_design: Function, find_fragments: Function
+    ) -> List[FunctionCall]:
+        calls = [FunctionCall(function=read_idea, arguments={"file_path": idea_path})]
+        calls += [
+            FunctionCall(function=get_design, arguments={"section": section})
+            for section in sections
+        ]
+        calls.append(
+            FunctionCall(
+                function=find_fragments,
+                arguments={"query": "term1 term2 term3 term4", "limit": 5},
+            )
+        )
+        return calls
+
+    model = Claude(id="claude-3-7-sonnet-latest")
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        _benchmark_project(root, documents)
+        idea_path = str(root / "IDEA.md")
+
+        with contextlib.ExitStack() as stack:
+            # Point the tools at the scratch project and silence their output
+            for module in (utils, reuse_index, history):
+                stack.enter_context(
+                    mock.patch.object(module, "get_project_root", lambda: root)
+                )
+            stack.enter_context(contextlib.redirect_stdout(io.StringIO()))
+
+            sync_tools = (
+                tools.read_idea_file,
+                tools.get_design_json,
+                tools.find_design_fragments,
+            )
+            async_tools = (
+                tools.read_idea_file_async,
+                tools.get_design_json_async,
+                tools.find_design_fragments_async,
+            )
+
+            def measure() -> Tuple[float, float]:
+                # Warm up the shared reuse index and file caches
+                run_sync_turn()
+
+                start = time.perf_counter()
+                for _ in range(turns):
+                    run_sync_turn()
+                sequential_ms = (time.perf_counter() - start) / turns * 1000
+
+                async def run_async_turns() -> float:
+                    await run_async_turn()
+                    start = time.perf_counter()
+                    for _ in range(turns):
+                        await run_async_turn()
+                    return (time.perf_counter() - start) / turns * 1000
+
+                return sequential_ms, asyncio.run(run_async_turns())
+
+            def run_sync_turn() -> None:
+                for _ in model.run_function_calls(turn_calls(*sync_tools), []):
+                    pass
+
+            async def run_async_turn() -> None:
+                async for _ in model.arun_function_calls(turn_calls(*async_tools), []):
+                    pass
+
+            results["sequential_ms"], results["concurrent_ms"] = measure()
+
+            # The async tools call the sync entrypoints, so both modes wait
+            for function in sync_tools:
+                assert function.entrypoint is not None
+                stack.enter_context(
+                    mock.patch.object(
+                        function,
+                        "entrypoint",
+                        _delayed(function.entrypoint, io_delay_ms / 1000),
+                    )
+                )
+            results["io_sequential_ms"], results["io_concurrent_ms"] = measure()
+
+    return results
+
+
+def parse_arguments():
+    """Parses CLI arguments."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark turn latency with and without concurrent tool calls"
+    )
+    parser.add_argument("--turns", type=int, default=50, help="Turns to average")
+    parser.add_argument(
+        "--documents", type=int, default=200, help="Documents in the reuse index"
+    )
+    parser.add_argument(
+        "--io-delay-ms",
+        type=float,
+        default=20.0,
+        help="I/O wait added to each tool call in the second run",
+    )
+    return parser.parse_args()
+
+
+def main():
+    """Runs the tool execution benchmark."""
+    args = parse_arguments()
+    results = benchmark(args.turns, args.documents, args.io_delay_ms)
+    print(
+        "Tool calls per turn: read_idea_file, 4 x get_design_json, find_design_fragments"
+    )
+    print(f"Sequential turn:     {results['sequential_ms']:.1f} ms")
+    print(f"Concurrent turn:     {results['concurrent_ms']:.1f} ms")
+    print(f"With {args.io_delay_ms:g} ms I/O wait per call:")
+    print(f"Sequential turn:     {results['io_sequential_ms']:.1f} ms")
+    print(f"Concurrent turn:     {results['io_concurrent_ms']:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,24 @@
 #!/usr/bin/env python3
 """Custom tools for Scrooge design document generator."""
+import asyncio
 import json
 import questionary
 import markdown_to_json
-from typing import Dict, Any, Optional
+from typing import Callable, Dict, Any, Optional
 from pathlib import Path
 from agno.tools import tool
+from agno.tools.function import Function
 from rich.prompt import Prompt
 
 # Import utils functions
-from utils import initialize_design_json, validate_design_json
+from utils import (
+    get_design_json_path,
+    initialize_design_json,
+    validate_design_json,
+)
+from history import get_design_signature, record_snapshot
+from reuse_index import get_reuse_index
+from tool_runner import run_in_thread, run_with_timeout
 
 
 @tool(show_result=True)
@@ -150,23 +159,210 @@ def update_design_json(section: str, content: Dict[str, Any]) -> str:
                 return json.dumps({"error": error_msg})
 
         # Verify the section exists
-        if section not in design_data:
+        if design_data is None or section not in design_data:
             return json.dumps(
                 {"error": f"Section '{section}' not found in DESIGN.json"}
             )
 
+        # Record DESIGN.json as it is on disk before overwriting it, so edits
+        # made outside this tool since the last snapshot can still be undone.
+        # This is a no-op when the file has not changed since HEAD.
+        history_error = None
+        before = get_design_signature()
+        try:
+            record_snapshot(
+                design_data, message=f"before update {section}", signature=before
+            )
+        except Exception as e:
+            history_error = e
+
         # Update the specified section
         design_data[section] = content
 
-        # Write the updated content back to the file
-        design_path = Path("DESIGN.json")
-        with open(design_path, "w") as file:
+        # Write the updated content back to the file. Replacing a temporary
+        # file keeps concurrent readers from seeing a partial document.
+        design_path = get_design_json_path()
+        tmp_path = design_path.with_suffix(".json.tmp")
+        with open(tmp_path, "w") as file:
             json.dump(design_data, file, indent=2)
+        tmp_path.replace(design_path)
 
         print(f"Section '{section}' updated successfully in DESIGN.json")
-        return json.dumps({"success": f"Section '{section}' updated successfully"})
+        result = {"success": f"Section '{section}' updated successfully"}
+
+        # Record the change in the version history. DESIGN.json is already
+        # written, so a history failure is reported but not as a failed update.
+        try:
+            record_snapshot(
+                design_data,
+                section,
+                f"update {section}",
+                signature=get_design_signature(),
+                base_signature=before,
+            )
+        except Exception as e:
+            history_error = e
+        if history_error is not None:
+            print(f"Error recording DESIGN.json history: {history_error}")
+            result["warning"] = (
+                f"History snapshot was not recorded: {str(history_error)}"
+            )
+
+        return json.dumps(result)
 
     except Exception as e:
         error_message = json.dumps({"error": f"Error updating DESIGN.json: {str(e)}"})
         print(f"Error: {e}")
         return error_message
+
+
+@tool(show_result=True)
+def find_design_fragments(query: str, limit: int = 5) -> str:
+    """Finds sections of past design documents that match the current idea.
+
+    Use the results as a starting point and adapt them to the customer's idea
+    instead of writing sections such as technology stacks, auth approaches,
+    UI components or user flows from scratch.
+
+    Args:
+        query: Description of the idea or the section being designed.
+        limit: Maximum number of fragments to return.
+
+    Returns:
+        JSON string with matching fragments and their source documents.
+    """
+    print(f"🛠️ [find_design_fragments] Searching for '{query}'")
+
+    try:
+        index = get_reuse_index()
+        if not index.manifest["segments"]:
+            return json.dumps({"fragments": [], "note": "Reuse index is empty"})
+        return json.dumps({"fragments": index.search(query, limit)}, indent=2)
+    except Exception as e:
+        error_message = json.dumps({"error": f"Error searching reuse index: {str(e)}"})
+        print(f"Error: {e}")
+        return error_message
+
+
+# Async versions of the tools. Read-only tools run with the timeout configured
+# in tool_runner.TOOL_TIMEOUTS and return a fallback result when it expires, so
+# independent tool calls in a turn can run concurrently with Agent.arun.
+
+# Serializes read-modify-write updates of DESIGN.json
+_design_update_lock = asyncio.Lock()
+
+# Only one question can be on the terminal at a time
+_ask_customer_lock = asyncio.Lock()
+
+
+def _sync_entrypoint(function: Function) -> Callable[..., str]:
+    """Returns the plain function behind a sync tool."""
+    if function.entrypoint is None:
+        raise ValueError(f"Tool '{function.name}' has no entrypoint")
+    return function.entrypoint
+
+
+@tool(name="ask_customer", show_result=True)
+async def ask_customer_async(question: str) -> str:
+    """Prompts the customer with a single question and collects the response.
+
+    Args:
+        question: The question to ask the customer.
+
+    Returns:
+        Formatted string with the question and response.
+    """
+    if not question:
+        return "No question provided."
+
+    fallback = (
+        f"Question: {question}\n"
+        "Response: No response from the customer. Continue with your best "
+        "assumption and ask again later if it matters."
+    )
+
+    async def ask() -> str:
+        # patch_stdout keeps output of concurrent tools above the prompt
+        response = await questionary.text(f"{question}").ask_async(patch_stdout=True)
+        return f"Question: {question}\nResponse: {response}"
+
+    # The timeout starts once the prompt is shown. Cancelling the prompt task
+    # closes the prompt, so an abandoned question does not block the session.
+    async with _ask_customer_lock:
+        print("🛠️ [ask_customer] Asking question.")
+        return await run_with_timeout("ask_customer", ask(), fallback)
+
+
+@tool(name="read_idea_file", show_result=True)
+async def read_idea_file_async(file_path: str) -> str:
+    """Reads product idea from file and converts markdown to JSON.
+
+    Args:
+        file_path: Path to file (typically IDEA.md).
+
+    Returns:
+        JSON string of markdown content or error message.
+    """
+    return await run_in_thread(
+        "read_idea_file", _sync_entrypoint(read_idea_file), file_path
+    )
+
+
+@tool(name="get_design_json", show_result=True)
+async def get_design_json_async(section: Optional[str] = None) -> str:
+    """Gets content from DESIGN.json.
+
+    Args:
+        section: Optional section to retrieve (idea, marketing, architecture, design, tasks).
+                If not provided, returns the entire file.
+
+    Returns:
+        JSON string of requested content.
+    """
+    return await run_in_thread(
+        "get_design_json", _sync_entrypoint(get_design_json), section
+    )
+
+
+@tool(name="update_design_json", show_result=True)
+async def update_design_json_async(section: str, content: Dict[str, Any]) -> str:
+    """Updates a section in DESIGN.json.
+
+    Args:
+        section: Section to update (idea, marketing, architecture, design, tasks).
+        content: JSON-compatible dict to store in the section.
+
+    Returns:
+        Success or error message.
+    """
+    # A write in a worker thread cannot be stopped, so it has no timeout and
+    # the lock is held until the thread has finished, even when cancelled.
+    async with _design_update_lock:
+        write = asyncio.ensure_future(
+            asyncio.to_thread(_sync_entrypoint(update_design_json), section, content)
+        )
+        try:
+            return await asyncio.shield(write)
+        except asyncio.CancelledError:
+            await write
+            raise
+
+
+@tool(name="find_design_fragments", show_result=True)
+async def find_design_fragments_async(query: str, limit: int = 5) -> str:
+    """Finds sections of past design documents that match the current idea.
+
+    Use the results as a starting point and adapt them to the customer's idea
+    instead of writing sections such as technology stacks, auth approaches,
+    UI components or user flows from scratch.
+
+    Args:
+        query: Description of the idea or the section being designed.
+        limit: Maximum number of fragments to return.
+
+    Returns:
+        JSON string with matching fragments and their source documents.
+    """
+    return await run_in_thread(
+        "find_design_fragments", _sync_entrypoint(find_design_fragments), query, limit
+    )